@@ -23,6 +23,10 @@ from reportlab.lib import colors
 from reportlab.lib.units import cm
 from reportlab.lib.pdfencrypt import StandardEncryption
 import os
+import time
+import tracemalloc
+import cProfile
+import pstats
 
 # ================= 配置区域 =================
 # 1. Excel 文件路径 (确保文件名正确)
@@ -34,6 +38,13 @@ PDF_BASE_PATH = "/Users/xxxxxx/xxxxxxx/xxxxxx.文件名字"
 # 3. 页眉内容
 HEADER_TEXT = "xxxxxxxx"
 
+# 4. 性能分析 (默认关闭，可用环境变量开启，无需改代码)
+#    STORM_PROFILE=1        记录各阶段耗时与内存分配，并打印排行
+#    STORM_PROFILE=cprofile 额外对 doc.build 做 cProfile，结果保存为 PDF 同名 .prof 文件
+PROFILE_MODE = os.environ.get("STORM_PROFILE", "").strip().lower()
+ENABLE_PROFILING = PROFILE_MODE not in ("", "0", "false", "off")
+ENABLE_CPROFILE = PROFILE_MODE == "cprofile"
+
 # ===========================================
 
 class HorizontalLine(Flowable):
@@ -83,12 +94,147 @@ def draw_header(canvas, doc):
     canvas.line(2*cm, y_pos - 0.2*cm, page_width - 2*cm, y_pos - 0.2*cm)
     canvas.restoreState()
 
+class StageProfiler:
+    """
+    分阶段性能记录器 (仅在 ENABLE_PROFILING 时生效)
+    - mark(name): 结束上一阶段并开始新阶段，记录耗时与内存分配
+    - install_hooks(): 临时包装 reportlab 内部方法，累计 Paragraph 解析 / KeepTogether 拆分 /
+      表格排版 / 字体嵌入 / 加密 的耗时 (这些发生在其他阶段内部，单独统计)
+    """
+    def __init__(self, label, enabled=False, use_cprofile=False):
+        self.label = label
+        self.enabled = enabled
+        self.use_cprofile = enabled and use_cprofile
+        self.stages = []    # [名称, 耗时秒, 净分配字节, 峰值字节]
+        self.hooks = {}     # 名称 -> [耗时秒, 调用次数, 净分配字节]
+        self._current = None
+        self._patched = []
+        self._depth = {}
+        self._started_tracemalloc = False
+
+    def start(self):
+        if not self.enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self.install_hooks()
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        self._close_stage()
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        self._current = (name, time.perf_counter(), tracemalloc.get_traced_memory()[0])
+
+    def _close_stage(self):
+        if self._current is None:
+            return
+        name, t0, mem0 = self._current
+        current, peak = tracemalloc.get_traced_memory()
+        self.stages.append([name, time.perf_counter() - t0, current - mem0, peak])
+        self._current = None
+
+    def _wrap(self, owner, attr, hook_name):
+        original = getattr(owner, attr, None)
+        if original is None:
+            return
+        profiler = self
+
+        def wrapper(*args, **kwargs):
+            # 递归调用 (如嵌套表格) 只统计最外层，避免重复计时
+            depth = profiler._depth.get(hook_name, 0)
+            profiler._depth[hook_name] = depth + 1
+            t0 = time.perf_counter()
+            mem0 = tracemalloc.get_traced_memory()[0]
+            try:
+                return original(*args, **kwargs)
+            finally:
+                profiler._depth[hook_name] = depth
+                if depth == 0:
+                    record = profiler.hooks.setdefault(hook_name, [0.0, 0, 0])
+                    record[0] += time.perf_counter() - t0
+                    record[1] += 1
+                    record[2] += tracemalloc.get_traced_memory()[0] - mem0
+
+        setattr(owner, attr, wrapper)
+        self._patched.append((owner, attr, original))
+
+    def install_hooks(self):
+        self._wrap(Paragraph, '__init__', "Paragraph 标记解析")
+        self._wrap(KeepTogether, 'split', "KeepTogether 拆分")
+        self._wrap(Table, 'wrap', "答案表格排版")
+        self._wrap(Table, 'split', "答案表格排版")
+        self._wrap(TTFont, 'addObjects', "字体嵌入")
+        self._wrap(StandardEncryption, 'prepare', "PDF 加密")
+        self._wrap(StandardEncryption, 'encode', "PDF 加密")
+
+    def remove_hooks(self):
+        while self._patched:
+            owner, attr, original = self._patched.pop()
+            setattr(owner, attr, original)
+
+    def build(self, doc, story, **kwargs):
+        """执行 doc.build，按需套上 cProfile 并保存到 PDF 同目录"""
+        if not self.use_cprofile:
+            return doc.build(story, **kwargs)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return doc.build(story, **kwargs)
+        finally:
+            profile.disable()
+            prof_path = os.path.splitext(doc.filename)[0] + ".prof"
+            try:
+                profile.dump_stats(prof_path)
+                print(f"🧪 cProfile 原始数据已保存: {prof_path}")
+            except Exception as e:
+                print(f"⚠️ cProfile 数据保存失败: {e}")
+            pstats.Stats(profile).sort_stats('cumulative').print_stats(15)
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self._close_stage()
+        self.remove_hooks()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def report(self):
+        if not self.enabled:
+            return
+        total = sum(s[1] for s in self.stages) or 1e-9
+        print("\n" + "="*60)
+        print(f"⏱️ 性能分析: {self.label}")
+        print("-" * 60)
+        print("【阶段】(按耗时排序)")
+        for name, secs, alloc, peak in sorted(self.stages, key=lambda s: s[1], reverse=True):
+            print(f"  {name:<20} {secs*1000:>10.1f} ms {secs/total:>6.1%}  分配 {alloc/1024:>9.1f} KB  峰值 {peak/1024:>9.1f} KB")
+        if self.hooks:
+            print("【内部环节】(包含在上面的阶段中)")
+            for name, (secs, calls, alloc) in sorted(self.hooks.items(), key=lambda h: h[1][0], reverse=True):
+                print(f"  {name:<20} {secs*1000:>10.1f} ms  {calls:>6} 次  分配 {alloc/1024:>9.1f} KB")
+        print("="*60 + "\n")
+
 # 【修改点 1】: 函数参数增加 judgment_choice
 def create_pdf_file(filename, single_choice, multi_choice, judgment_choice, font_name, mode='inline'):
     """
     :param judgment_choice: 判断题列表
     """
+    profiler = StageProfiler(os.path.basename(filename), enabled=ENABLE_PROFILING, use_cprofile=ENABLE_CPROFILE)
+    profiler.start()
+    try:
+        _build_pdf_file(filename, single_choice, multi_choice, judgment_choice, font_name, mode, profiler)
+    finally:
+        profiler.stop()
+        profiler.report()
+
+def _build_pdf_file(filename, single_choice, multi_choice, judgment_choice, font_name, mode, profiler):
     content_width = A4[0] - 4*cm
+
+    profiler.mark("加密与文档设置")
     
     encrypt_config = StandardEncryption(
         userPassword="", 
@@ -103,6 +249,7 @@ def create_pdf_file(filename, single_choice, multi_choice, judgment_choice, font
         encrypt=encrypt_config
     )
     
+    profiler.mark("样式设置")
     styles = getSampleStyleSheet()
     title_style = ParagraphStyle(name='ExamTitle', parent=styles['Heading1'], fontName=font_name, fontSize=20, alignment=1, spaceAfter=20, textColor=colors.black)
     section_style = ParagraphStyle(name='SectionHeader', parent=styles['Heading2'], fontName=font_name, fontSize=15, spaceBefore=15, spaceAfter=10, textColor=colors.HexColor("#2c3e50"), borderPadding=5)
@@ -110,6 +257,7 @@ def create_pdf_file(filename, single_choice, multi_choice, judgment_choice, font
     option_style = ParagraphStyle(name='OptionText', parent=styles['Normal'], fontName=font_name, fontSize=10.5, leftIndent=15, leading=16, textColor=colors.HexColor("#34495e"))
     answer_style = ParagraphStyle(name='AnswerText', parent=styles['Normal'], fontName=font_name, fontSize=10, textColor=colors.HexColor("#1e8449"), leftIndent=15, spaceBefore=5, spaceAfter=5, backColor=colors.HexColor("#e8f8f5"), borderPadding=3)
 
+    profiler.mark("单选题组装")
     story = []
     story.append(Paragraph("《xxxxxxxxxxxxxxxx》题库", title_style))
     story.append(Spacer(1, 0.5*cm))
@@ -143,6 +291,7 @@ def create_pdf_file(filename, single_choice, multi_choice, judgment_choice, font
             story.append(KeepTogether(q_elements))
 
     # ================= 2. 多选题 =================
+    profiler.mark("多选题组装")
     if multi_choice:
         if single_choice: story.append(PageBreak())
         story.append(Paragraph(f"二、多选题 (共 {len(multi_choice)} 题)", section_style))
@@ -167,6 +316,7 @@ def create_pdf_file(filename, single_choice, multi_choice, judgment_choice, font
             story.append(KeepTogether(q_elements))
 
     # ================= 3. 判断题 (新增板块) =================
+    profiler.mark("判断题组装")
     if judgment_choice:
         # 如果前面有题，换页
         if single_choice or multi_choice: story.append(PageBreak())
@@ -199,6 +349,7 @@ def create_pdf_file(filename, single_choice, multi_choice, judgment_choice, font
 
     # ================= 练习版答案汇总 =================
     if mode == 'end':
+        profiler.mark("答案表格生成")
         story.append(PageBreak())
         story.append(Paragraph("参考答案", title_style))
         story.append(HorizontalLine())
@@ -249,7 +400,8 @@ def create_pdf_file(filename, single_choice, multi_choice, judgment_choice, font
 
     try:
         print(f"📄 正在写入 PDF 文件: {filename} ...")
-        doc.build(story, onFirstPage=draw_header, onLaterPages=draw_header)
+        profiler.mark("doc.build")
+        profiler.build(doc, story, onFirstPage=draw_header, onLaterPages=draw_header)
         print(f"✅ 成功! 文件已生成: {filename}")
     except Exception as e:
         print(f"❌ 生成文件失败: {e}")
@@ -267,6 +419,9 @@ def generate_exam_pdf():
         print("❌ 未找到中文字体，无法生成 PDF。")
         return
 
+    font_profiler = StageProfiler("字体注册", enabled=ENABLE_PROFILING)
+    font_profiler.start()
+    font_profiler.mark("TTFont 加载与注册")
     try:
         pdfmetrics.registerFont(TTFont('ChineseFont', font_path))
     except Exception as e:
@@ -275,6 +430,9 @@ def generate_exam_pdf():
         except:
              print(f"❌ 字体注册失败: {e}")
              return
+    finally:
+        font_profiler.stop()
+        font_profiler.report()
 
     print(f"📊 读取 Excel: {EXCEL_PATH} ...")
     try: